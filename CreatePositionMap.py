@@ -4,8 +4,13 @@ import math
 
 def onCook(dat):
     # Access data
-    data_base = op('/LionData')
+    # Use the rig this DAT lives in (each rig COMP has its own points_processed),
+    # falling back to the single-rig /LionData component
+    data_base = parent()
     points_table = data_base.op('points_processed')
+    if points_table is None:
+        data_base = op('/LionData')
+        points_table = data_base.op('points_processed')
     
     # Find nose center
     nose_x, nose_y, nose_z = 0, 0, 0
@@ -24,10 +29,14 @@ def onCook(dat):
         nose_y /= nose_count
         nose_z /= nose_count
     
+    # Geodesic (along-the-bars) distance columns added by DataProcessor, e.g. geo_nariz
+    header = [str(cell.val) for cell in points_table.row(0)]
+    geo_columns = [c for c, name in enumerate(header) if name.startswith('geo_')]
+    
     # Create a table for the position map
-    # Format: point_idx, normalized_angle, normalized_distance, bar_id, bar_position, group
+    # Format: point_idx, normalized_angle, normalized_distance, bar_id, bar_position, group, geo_* ...
     dat.clear()
-    dat.appendRow(['idx', 'angle', 'distance', 'bar_id', 'bar_position', 'group'])
+    dat.appendRow(['idx', 'angle', 'distance', 'bar_id', 'bar_position', 'group'] + [header[c] for c in geo_columns])
     
     # Calculate for each point
     for i in range(1, points_table.numRows):
@@ -61,7 +70,7 @@ def onCook(dat):
             bar_id, 
             bar_position, 
             group
-        ])
+        ] + [float(row[c].val) for c in geo_columns])
     
     # Note: This is raw data, not a proper texture yet
     print(f"Position map created with {dat.numRows-1} points, using integer bar IDs")
\ No newline at end of file
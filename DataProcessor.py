@@ -12,7 +12,15 @@
 
 
 def onTableChange(dat):
-    process_data()	
+    trace_id = LatencyTracer.trace_begin('geometry_edit')
+    # With rigs registered, only the rigs whose inputs changed are recomputed
+    # (the default tables next to this DAT are processed as one of them)
+    if rigs:
+        if trace_id is not None:
+            edit_traces.append(trace_id)
+        process_rigs()
+    else:
+        process_data()
     return
 
 def onRowChange(dat, rows):
@@ -28,35 +36,324 @@ def onSizeChange(dat):
 	return
 	
 # Data processor for Lion LED system
+import LatencyTracer
+
+# Groups the geodesic distances are measured from (one position-map channel each, max 4)
+GEODESIC_SEEDS = ['nariz', 'olhos']
+
+# Points closer than this are treated as the same joint when building the bar graph
+WELD_TOLERANCE = 0.001
+
+# Imported pixels sit at cell centers, so the end pixels of two bars meeting at a
+# joint are about one pixel pitch apart. Bar ends closer than this many pitches
+# (average of both bars, plus WELD_TOLERANCE) are joined with their real distance.
+JOINT_PITCH_FACTOR = 1.25
+
+
+class RigState:
+    # All input/output tables and processed data of one sculpture (rig).
+    # Each rig is fully isolated, so several rigs can be computed at the same time.
+    # Computations run on worker threads; the threads share the GIL, so they do not
+    # speed up the math itself, but they keep the TouchDesigner cook from blocking.
+    def __init__(self, name, base=None, geometry_file=None):
+        self.name          = name
+        # COMP holding this rig's tables (None = the tables next to this DAT)
+        self.base          = base
+        # Optional led_positions.json / OBJ file used instead of the input DATs
+        self.geometry_file = geometry_file
+        self.geometry_cache_dir = None
+        # Snapshot of the input tables (list of rows of strings) and its hash
+        self.inputs        = None
+        self.input_hash    = None
+        # Running computation (Future) and whether inputs changed while it ran
+        self.future        = None
+        self.dirty         = False
+        # Latency traces of the edits the running computation includes, and of the
+        # edits waiting for the next one (see LatencyTracer)
+        self.traces        = []
+        self.next_traces   = []
+        # Processed data
+        self.points        = {}
+        self.groups        = {}
+        self.primitives    = {}
+        self.nose_position = [0, 0, 0]
+        self.min_distance  = 0
+        self.max_distance  = 0
+        # Groups used as sources for the along-the-bars (geodesic) distances
+        self.geodesic_seeds = list(GEODESIC_SEEDS)
+        # Log lines of the computation, printed later on the main thread
+        # (the TextPort is a TouchDesigner object and must not be used from workers)
+        self.messages      = []
+
+    def log(self, message):
+        self.messages.append(message)
+        return
 
-# Access to other components
-points_dat = op('points')
-primitives_dat = op('primitives')
-vertices_dat = op('vertices') 
+    def flush_log(self):
+        # Print the collected log lines (main thread only)
+        messages, self.messages = self.messages, []
+        for message in messages:
+            debug_log(message)
+        return
+
+    def op(self, name):
+        # Find a table of this rig
+        if self.base is None:
+            return op(name)
+        base = op(self.base)
+        return base.op(name) if base else None
+
+# Rig used by the single-rig path (tables next to this DAT)
+default_rig = RigState('default')
+
+# Registered rigs for multi-rig mode (name -> RigState)
+rigs = {}
+
+# Worker pool shared by all rigs (created on first use)
+rig_executor = None
+
+# Latency traces of geometry edits not yet handed to a rig
+edit_traces = []
 
 
 def process_data():
     # Main data processing function
-    parse_csv_data()
-    calculate_nose_position()
-    calculate_distances()
-    calculate_bar_positions()  # New function to calculate positions along bars
-    update_results()  # Modified to update existing tables instead of creating new ones
+    process_rig(default_rig)
+    return
+
+def process_geometry_file(path):
+    # Same as process_data, but geometry comes from a led_positions.json or OBJ file.
+    # Only for this call - later table changes go back to the points/primitives DATs.
+    rig = RigState(default_rig.name, default_rig.base, geometry_file=path)
+    rig.geodesic_seeds = list(default_rig.geodesic_seeds)
+    process_rig(rig)
+    return
+
+def process_rig(rig):
+    # Process a single rig on the calling thread
+    read_inputs(rig)
+    try:
+        compute_rig(rig)
+    finally:
+        rig.flush_log()
+    LatencyTracer.trace_stage('process_data')
+    update_results(rig)
+    LatencyTracer.trace_stage('update_results')
+    return
+
+def add_rig(name, base, geometry_file=None):
+    # Register a rig whose points/primitives/vertices and output tables live inside the COMP 'base'
+    rigs[name] = RigState(name, base, geometry_file)
+    debug_log(f"Registered rig '{name}' ({base})")
+    return rigs[name]
+
+def remove_rig(name):
+    rigs.pop(name, None)
+    return
+
+def active_rigs():
+    # Registered rigs, plus the default rig while its tables exist next to this DAT
+    # (so edits to the default points/primitives keep working in multi-rig mode)
+    active = list(rigs.values())
+    if default_rig not in active and (default_rig.future is not None or default_rig.op('points') is not None):
+        active.insert(0, default_rig)
+    return active
+
+def process_rigs(force=False):
+    # Start processing the registered rigs whose inputs changed, on the worker pool.
+    # This does not wait: poll_rigs() (called every frame by the RigPoller Execute DAT)
+    # writes the results back when each rig is done, so the cook never blocks.
+    # Tables are only touched on the main thread (TouchDesigner is not thread-safe).
+    traces = list(edit_traces)
+    del edit_traces[:]
+    
+    submitted = []
+    for rig in active_rigs():
+        if rig.future is not None:
+            # Still computing - re-check its inputs as soon as it finishes
+            rig.dirty = True
+            rig.next_traces += traces
+            continue
+        if submit_rig(rig, force, traces):
+            submitted.append(rig.name)
+    
+    # Edits that changed no rig have nothing to wait for
+    finish_traces([t for t in traces if t not in held_traces()])
+    
+    if submitted:
+        debug_log(f"Submitted rigs: {', '.join(submitted)}")
+    return submitted
+
+def submit_rig(rig, force=False, traces=()):
+    # Snapshot the inputs (main thread) and start the computation if they changed.
+    # traces are the latency traces of the edits this computation includes.
+    from concurrent.futures import ThreadPoolExecutor
+    import os
+    global rig_executor
+    
+    previous_hash = rig.input_hash
+    read_inputs(rig)
+    if not force and rig.input_hash == previous_hash:
+        return False
+    
+    if rig_executor is None:
+        rig_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4,
+                                          thread_name_prefix='rig')
+    rig.traces = list(traces)
+    rig.future = rig_executor.submit(compute_rig, rig)
+    return True
+
+def held_traces():
+    # Latency traces still waiting for a rig computation
+    held = set()
+    for rig in active_rigs():
+        held.update(rig.traces)
+        held.update(rig.next_traces)
+    return held
+
+def finish_traces(traces):
+    # Edits that need no (more) computation go straight through both stages
+    if traces:
+        LatencyTracer.trace_stage('process_data', traces)
+        LatencyTracer.trace_stage('update_results', traces)
+    return
+
+def poll_rigs():
+    # Write back the results of finished rigs (main thread, once per frame)
+    finished = []
+    done_traces = []
+    for rig in active_rigs():
+        if rig.future is None or not rig.future.done():
+            continue
+        future = rig.future
+        rig.future = None
+        rig.flush_log()
+        done_traces += rig.traces
+        rig.traces = []
+        try:
+            future.result()
+        except Exception as e:
+            debug_log(f"Error processing rig '{rig.name}': {e}")
+            # Force a retry on the next change
+            rig.input_hash = None
+        else:
+            finished.append(rig)
+    
+    # Inputs changed while these rigs were computing
+    for rig in active_rigs():
+        if rig.dirty and rig.future is None:
+            rig.dirty = False
+            traces = rig.next_traces
+            rig.next_traces = []
+            if not submit_rig(rig, traces=traces):
+                done_traces += traces
+    
+    # An edit is done once no rig is computing it anymore (it may span several rigs)
+    held = held_traces()
+    done_traces = [t for t in dict.fromkeys(done_traces) if t not in held]
+    
+    # Computation of these edits is done - stamp before writing the tables
+    if done_traces:
+        LatencyTracer.trace_stage('process_data', done_traces)
+    
+    processed = []
+    for rig in finished:
+        update_results(rig)
+        processed.append(rig.name)
+    
+    if done_traces:
+        LatencyTracer.trace_stage('update_results', done_traces)
+    if processed:
+        debug_log(f"Processed rigs: {', '.join(processed)}")
+    return processed
+
+def read_inputs(rig):
+    # Snapshot the input tables of a rig as plain strings (main thread only)
+    import hashlib
+    
+    digest = hashlib.sha1()
+    if rig.geometry_file:
+        import GeometryImporter
+        rig.inputs = None
+        # Resolved here because it reads project.folder, which is not thread-safe
+        rig.geometry_cache_dir = GeometryImporter.default_cache_dir()
+        digest.update(GeometryImporter.source_hash(rig.geometry_file).encode())
+    else:
+        rig.inputs = {}
+        for name in ['points', 'primitives', 'vertices']:
+            dat = rig.op(name)
+            rows = [[cell.val for cell in row] for row in dat.rows()] if dat else []
+            rig.inputs[name] = rows
+            digest.update(repr(rows).encode())
+    rig.input_hash = digest.hexdigest()
+    return
+
+def compute_rig(rig):
+    # All calculations of a rig - only uses the rig's own state and logs through rig.log,
+    # so it is safe to run in a worker thread
+    if rig.geometry_file:
+        parse_geometry_file(rig, rig.geometry_file, rig.geometry_cache_dir)
+    else:
+        parse_csv_data(rig)
+    calculate_nose_position(rig)
+    calculate_distances(rig)
+    calculate_bar_positions(rig)  # New function to calculate positions along bars
+    calculate_geodesic_distances(rig)
+    return
+
+def parse_geometry_file(rig, path, cache_dir=None):
+    # Fill points/groups/primitives from the (cached) array geometry instead of the DATs
+    import GeometryImporter
+    
+    geometry = GeometryImporter.load_geometry(path, cache_dir=cache_dir, log=rig.log)
+    group_names = geometry['group_names']
+    
+    # Convert whole arrays to Python lists at once (much faster than per-element access)
+    positions = geometry['positions'].tolist()
+    point_groups = [group_names[g] for g in geometry['point_groups'].tolist()]
+    
+    points = {}
+    groups = {}
+    for idx, (position, group_name) in enumerate(zip(positions, point_groups)):
+        points[idx] = {
+            'position': position,
+            'group': group_name,
+            'bar_id': None,
+            'bar_position': None
+        }
+        groups.setdefault(group_name, []).append(idx)
+    
+    primitives = {}
+    offsets = geometry['prim_offsets'].tolist()
+    prim_vertices = geometry['prim_vertices'].tolist()
+    prim_closed = geometry['prim_closed'].tolist()
+    prim_groups = geometry['prim_groups'].tolist()
+    for i, bar_id in enumerate(geometry['prim_ids'].tolist()):
+        primitives[bar_id] = {
+            'vertices': prim_vertices[offsets[i]:offsets[i + 1]],
+            'close': prim_closed[i],
+            'group': group_names[prim_groups[i]],
+            'length': 0
+        }
+    
+    rig.log(f"Loaded {len(points)} points in {len(groups)} groups from {path}")
+    rig.log(f"Loaded {len(primitives)} primitives")
+    
+    rig.points, rig.groups, rig.primitives = points, groups, primitives
     return
 
-def parse_csv_data():
-    # Parse points data
-    global points, groups
+def parse_csv_data(rig):
+    # Parse points data (from the snapshot taken by read_inputs)
     points = {}
     groups = {}
+    points_rows = rig.inputs['points']
+    primitives_rows = rig.inputs['primitives']
     
     # Skip header row
-    for i in range(1, points_dat.numRows):
-        row = points_dat.row(i)
-        # Convert td.Cell objects to Python primitives
-        idx = int(row[0].val)  # Use .val to get the actual value
-        position = [float(row[1].val), float(row[2].val), float(row[3].val)]
-        group_name = str(row[5].val)  # Convert to string explicitly
+    for row in points_rows[1:]:
+        idx = int(row[0])
+        position = [float(row[1]), float(row[2]), float(row[3])]
+        group_name = str(row[5])
         
         # Store point data
         points[idx] = {
@@ -72,16 +369,13 @@ def parse_csv_data():
         groups[group_name].append(idx)
     
     # Parse primitives data
-    global primitives
     primitives = {}
     
-    for i in range(1, primitives_dat.numRows):
-        row = primitives_dat.row(i)
-        # Convert td.Cell objects to Python primitives
-        idx = int(row[0].val)
-        vertices_str = str(row[1].val)
-        close = int(row[2].val)
-        group_name = str(row[3].val)
+    for row in primitives_rows[1:]:
+        idx = int(row[0])
+        vertices_str = str(row[1])
+        close = int(row[2])
+        group_name = str(row[3])
         
         # Parse vertices list
         vertex_indices = [int(v) for v in vertices_str.split()]
@@ -94,13 +388,16 @@ def parse_csv_data():
         }
     
     # Log results
-    debug_log(f"Parsed {len(points)} points in {len(groups)} groups")
-    debug_log(f"Parsed {len(primitives)} primitives")
+    rig.log(f"Parsed {len(points)} points in {len(groups)} groups")
+    rig.log(f"Parsed {len(primitives)} primitives")
+    
+    rig.points, rig.groups, rig.primitives = points, groups, primitives
     return
 
-def calculate_nose_position():
+def calculate_nose_position(rig):
     # Find the nose position (center of the 'nariz' group)
-    global nose_position
+    points = rig.points
+    groups = rig.groups
     
     if 'nariz' in groups and groups['nariz']:
         # Calculate center of nariz group
@@ -119,17 +416,19 @@ def calculate_nose_position():
         nose_position[2] /= len(positions)
     else:
         # Fallback if no nariz group
-        debug_log("Warning: 'nariz' group not found")
+        rig.log("Warning: 'nariz' group not found")
         nose_position = [0, 0, 0]
     
-    debug_log(f"Nose position: {nose_position}")
+    rig.nose_position = nose_position
+    rig.log(f"Nose position: {nose_position}")
     return
 
-def calculate_distances():
+def calculate_distances(rig):
     # Calculate distance from nose for each point
     import math
     
-    global min_distance, max_distance
+    points = rig.points
+    nose_position = rig.nose_position
     min_distance = float('inf')
     max_distance = 0
     
@@ -156,13 +455,18 @@ def calculate_distances():
         norm_dist = (raw_dist - min_distance) / distance_range
         points[idx]['normalized_distance'] = norm_dist
     
-    debug_log(f"Distance range: {min_distance} to {max_distance}")
+    rig.min_distance = min_distance
+    rig.max_distance = max_distance
+    rig.log(f"Distance range: {min_distance} to {max_distance}")
     return
 
-def calculate_bar_positions():
+def calculate_bar_positions(rig):
     # Calculate position along bar for each point
     import math
     
+    points = rig.points
+    primitives = rig.primitives
+    
     # Create a mapping from point ID to bar ID
     point_to_bar = {}
     
@@ -239,14 +543,163 @@ def calculate_bar_positions():
             else:
                 point['normalized_bar_id'] = 0
     
-    debug_log(f"Calculated bar positions for {len(point_to_bar)} points")
+    rig.log(f"Calculated bar positions for {len(point_to_bar)} points")
     return
 
-def update_results():
+def build_bar_graph(rig):
+    # Adjacency list over points: neighbours along each bar, plus joints between bars
+    import math
+    
+    points = rig.points
+    adjacency = {idx: [] for idx in points}
+    
+    def connect(a, b, length):
+        adjacency[a].append((b, length))
+        adjacency[b].append((a, length))
+    
+    def distance(a, b):
+        p1 = points[a]['position']
+        p2 = points[b]['position']
+        dx = p2[0] - p1[0]
+        dy = p2[1] - p1[1]
+        dz = p2[2] - p1[2]
+        return math.sqrt(dx*dx + dy*dy + dz*dz)
+    
+    # End pixels of the open bars: (point index, bar id, pixel pitch at that end)
+    bar_ends = []
+    
+    # Segments along each bar (closed primitives also join last and first vertex)
+    for bar_id, bar_data in rig.primitives.items():
+        vertices = [v for v in bar_data['vertices'] if v in points]
+        segments = list(zip(vertices, vertices[1:]))
+        if bar_data['close'] and len(vertices) > 2:
+            segments.append((vertices[-1], vertices[0]))
+        
+        for a, b in segments:
+            connect(a, b, distance(a, b))
+        
+        if not bar_data['close'] and len(vertices) > 1:
+            bar_ends.append((vertices[0], bar_id, distance(vertices[0], vertices[1])))
+            bar_ends.append((vertices[-1], bar_id, distance(vertices[-1], vertices[-2])))
+    
+    # Bars meeting at a joint share a vertex index, or have separate points at
+    # the same position - weld points within WELD_TOLERANCE with zero-length edges.
+    # Points are hashed into cells of WELD_TOLERANCE size; a point can only be
+    # that close to points in its own or one of the 26 neighbouring cells.
+    cells = {}
+    for idx, point_data in points.items():
+        pos = point_data['position']
+        cell = (math.floor(pos[0] / WELD_TOLERANCE), math.floor(pos[1] / WELD_TOLERANCE), math.floor(pos[2] / WELD_TOLERANCE))
+        cells.setdefault(cell, []).append(idx)
+    
+    welded = 0
+    max_dist_sq = WELD_TOLERANCE * WELD_TOLERANCE
+    neighbours = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    for (cx, cy, cz), indices in cells.items():
+        for dx, dy, dz in neighbours:
+            others = cells.get((cx + dx, cy + dy, cz + dz))
+            if not others:
+                continue
+            for a in indices:
+                p1 = points[a]['position']
+                for b in others:
+                    # Each pair once
+                    if b <= a:
+                        continue
+                    p2 = points[b]['position']
+                    ex = p2[0] - p1[0]
+                    ey = p2[1] - p1[1]
+                    ez = p2[2] - p1[2]
+                    if ex*ex + ey*ey + ez*ez <= max_dist_sq:
+                        connect(a, b, 0.0)
+                        welded += 1
+    
+    # Bars whose start/end coincide, but whose end pixels are set back from the
+    # joint (e.g. led_positions.json pixels at cell centers): join the end pixels
+    # of different bars within JOINT_PITCH_FACTOR pitches, with their real distance.
+    # Same cell hashing as above, with cells as large as the longest reach.
+    joined = 0
+    reach = max((pitch for _, _, pitch in bar_ends), default=0) * JOINT_PITCH_FACTOR + WELD_TOLERANCE
+    end_cells = {}
+    for end in bar_ends:
+        pos = points[end[0]]['position']
+        cell = (math.floor(pos[0] / reach), math.floor(pos[1] / reach), math.floor(pos[2] / reach))
+        end_cells.setdefault(cell, []).append(end)
+    
+    for (cx, cy, cz), ends in end_cells.items():
+        for dx, dy, dz in neighbours:
+            others = end_cells.get((cx + dx, cy + dy, cz + dz))
+            if not others:
+                continue
+            for a, bar_a, pitch_a in ends:
+                for b, bar_b, pitch_b in others:
+                    # Each pair once, and only between different bars
+                    if b <= a or bar_a == bar_b:
+                        continue
+                    length = distance(a, b)
+                    # Already welded above
+                    if length <= WELD_TOLERANCE:
+                        continue
+                    if length <= JOINT_PITCH_FACTOR * (pitch_a + pitch_b) / 2 + WELD_TOLERANCE:
+                        connect(a, b, length)
+                        joined += 1
+    
+    rig.log(f"Bar graph: {len(points)} points, {welded} welded joints, {joined} bar end joints")
+    return adjacency
+
+def calculate_geodesic_distances(rig):
+    # Shortest distance along the bars from each seed group (multi-source Dijkstra)
+    import heapq
+    
+    points = rig.points
+    groups = rig.groups
+    adjacency = build_bar_graph(rig)
+    
+    for idx in points:
+        points[idx]['geodesic'] = {}
+        points[idx]['normalized_geodesic'] = {}
+    
+    for seed in rig.geodesic_seeds:
+        sources = groups.get(seed, [])
+        if not sources:
+            rig.log(f"Warning: geodesic seed group '{seed}' not found")
+        
+        # All points of the seed group start at distance 0
+        distances = {idx: 0.0 for idx in sources}
+        queue = [(0.0, idx) for idx in sources]
+        heapq.heapify(queue)
+        
+        while queue:
+            dist, idx = heapq.heappop(queue)
+            if dist > distances[idx]:
+                continue
+            for neighbour, length in adjacency[idx]:
+                new_dist = dist + length
+                if new_dist < distances.get(neighbour, float('inf')):
+                    distances[neighbour] = new_dist
+                    heapq.heappush(queue, (new_dist, neighbour))
+        
+        # Normalize to 0-1; points not connected to the seed get 1.0 (furthest)
+        max_dist = max(distances.values()) if distances else 0
+        for idx in points:
+            dist = distances.get(idx)
+            points[idx]['geodesic'][seed] = dist if dist is not None else -1
+            if dist is None:
+                points[idx]['normalized_geodesic'][seed] = 1.0
+            else:
+                points[idx]['normalized_geodesic'][seed] = dist / max_dist if max_dist > 0 else 0.0
+        
+        rig.log(f"Geodesic distances from '{seed}': {len(distances)} of {len(points)} points reached, max {max_dist}")
+    return
+
+def update_results(rig):
     # Update existing tables instead of creating new ones
+    points = rig.points
+    groups = rig.groups
+    primitives = rig.primitives
     
     # Update points_processed table with distances
-    points_out = op('points_processed')
+    points_out = rig.op('points_processed')
     if points_out:
         # Clear the table but preserve the header row
         header = []
@@ -256,10 +709,13 @@ def update_results():
         points_out.clear()
         
         # Check if we need to add our headers or use existing ones
-        if not header or len(header) == 0:
-            points_out.appendRow(['index', 'x', 'y', 'z', 'group', 'distance', 'norm_distance', 'bar_id', 'norm_bar_id', 'bar_position'])
-        else:
-            points_out.appendRow(header)
+        # (one extra geo_<seed> column with the normalized geodesic distance per seed group)
+        default_header = ['index', 'x', 'y', 'z', 'group', 'distance', 'norm_distance', 'bar_id', 'norm_bar_id', 'bar_position']
+        geo_header = [f"geo_{seed}" for seed in rig.geodesic_seeds]
+        # The geo_* names must match the current seeds, not just the column count
+        if not header or len(header) != len(default_header) + len(geo_header) or header[len(default_header):] != geo_header:
+            header = default_header + geo_header
+        points_out.appendRow(header)
         
         # Add data
         for idx, point_data in points.items():
@@ -280,6 +736,7 @@ def update_results():
                 norm_bar_id,
                 bar_position
             ]
+            row += [point_data['normalized_geodesic'][seed] for seed in rig.geodesic_seeds]
             points_out.appendRow(row)
         
         debug_log(f"Updated points_processed table with {points_out.numRows - 1} rows")
@@ -287,7 +744,7 @@ def update_results():
         debug_log("Warning: points_processed table not found")
     
     # Update groups_info table
-    groups_out = op('groups_info')
+    groups_out = rig.op('groups_info')
     if groups_out:
         # Clear the table but preserve the header row
         header = []
@@ -318,7 +775,7 @@ def update_results():
         debug_log("Warning: groups_info table not found")
     
     # Update primitives_info table
-    primitives_out = op('primitives_info')
+    primitives_out = rig.op('primitives_info')
     if primitives_out:
         # Clear the table but preserve the header row
         header = []
@@ -351,4 +808,47 @@ def update_results():
 def debug_log(message):
     # Print to TextPort for debugging
     print(message)
-    return
\ No newline at end of file
+    return
+
+
+def check_geodesic_joints():
+    # Regression check (outside TouchDesigner): a chain of three bars from a
+    # led_positions.json file must be joined end to end, so the geodesic
+    # distances flow from the seed bar over the whole chain.
+    import json
+    import math
+    import os
+    import shutil
+    import tempfile
+    
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'led_positions.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'pixels_per_bar': 10, 'bars': [
+            {'start': [0, 0, 0], 'end': [1, 0, 0], 'group': 'nariz'},
+            {'start': [1, 0, 0], 'end': [1, 1, 0], 'group': 'juba'},
+            {'start': [1, 1, 0], 'end': [2, 1, 0], 'group': 'juba'}
+        ]}, f)
+    
+    rig = RigState('check', geometry_file=path)
+    rig.geodesic_seeds = ['nariz']
+    rig.geometry_cache_dir = os.path.join(folder, 'geometry_cache')
+    try:
+        compute_rig(rig)
+    finally:
+        rig.flush_log()
+        shutil.rmtree(folder, ignore_errors=True)
+    
+    geodesic = [rig.points[idx]['geodesic']['nariz'] for idx in sorted(rig.points)]
+    assert all(d >= 0 for d in geodesic), "points not reached from the seed bar"
+    # Distances keep growing along the chain: 0 on the seed bar, then two corners
+    # (end pixels 0.05 from the joint on both bars) and two bars of 0.9 between end pixels
+    expected = 2 * (0.9 + 0.05 * math.sqrt(2))
+    assert geodesic[10:] == sorted(geodesic[10:]), "distances do not flow along the chain"
+    assert abs(geodesic[-1] - expected) < 0.001, f"unexpected distance at the chain end: {geodesic[-1]}"
+    debug_log("Geodesic joint check passed")
+    return
+
+
+if __name__ == '__main__':
+    check_geodesic_joints()
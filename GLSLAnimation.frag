@@ -40,6 +40,12 @@ uniform float u_transition_duration;  // Duration in seconds (for timing effects
 
 uniform float u_DEBUG; // Debugging variable (0=off, 1=on)
 
+// Geodesic (along-the-bars) distance map, assigned on the GLSL TOP's Samplers page.
+// Same layout as the position map: R/G/B/A = distance from each seed group (see GEODESIC_SEEDS in DataProcessor)
+uniform sampler2D sGeodesicMap;
+uniform int u_use_geodesic;       // 0=straight-line distance from the nose, 1=distance along the bars
+uniform int u_geodesic_channel;   // Seed group channel to propagate from (0=R/nariz, 1=G/olhos, 2=B, 3=A)
+
 // Define the group IDs for each facial feature
 const int EYES_GROUP = 2;        // Group for eyes
 const int EYEBROWS_GROUP = 4;    // Group for eyebrows/brows
@@ -69,9 +75,19 @@ vec4 sampleGroupTexture(int bar_id) {
     return texture(sTD2DInputs[2], vec2(u, v));
 }
 
+// Distance used by propagating patterns: straight-line (position map G channel)
+// or precomputed along-the-bars distance (one texture read)
+float propagationDistance(vec2 uv, vec4 pos) {
+    if (u_use_geodesic == 0) {
+        return pos.y;
+    }
+    vec4 geo = texture(sGeodesicMap, uv);
+    return geo[clamp(u_geodesic_channel, 0, 3)];
+}
+
 // Wave pattern
 vec3 animateWave(vec2 uv, vec4 pos, float group_id) {
-    float distance = pos.y;  // Normalized distance in G channel
+    float distance = propagationDistance(uv, pos);  // Normalized distance (straight or along the bars)
     float angle = pos.x;     // Normalized angle in R channel
     
     // Calculate wave position
@@ -96,7 +112,7 @@ vec3 animateWave(vec2 uv, vec4 pos, float group_id) {
 
 // Breathing pattern
 vec3 animateBreathing(vec2 uv, vec4 pos, float group_id) {
-    float distance = pos.y;  // Normalized distance
+    float distance = propagationDistance(uv, pos);  // Normalized distance
     
     // Calculate breathing phase with delay based on distance
     float phase = (sin(u_time * 0.02) + 1.0) / 2.0;
@@ -577,7 +593,7 @@ vec3 animateSymmetricalChase(vec2 uv, vec4 pos, float group_id) {
 // NEW ANIMATION 4: Axis Ripple - Expanding oval ripples along axes
 vec3 animateAxisRipple(vec2 uv, vec4 pos, float group_id) {
     float angle = pos.x;         // Normalized angle in R channel (0-1)
-    float distance = pos.y;      // Normalized distance in G channel (0-1)
+    float distance = propagationDistance(uv, pos);  // Normalized distance (0-1)
     
     // Convert angle to radians (0-2π)
     float angle_rad = angle * 2.0 * 3.14159;
@@ -2129,6 +2145,8 @@ vec3 groupHighlightToNoseLinesTransition(vec2 uv, vec4 pos, float group_id, floa
 }
 
 // Main transition dispatcher function
+// (legacy single-shader path - TransitionCompositor.py + GLSLTransitionCompositor.frag
+// blend two LED-resolution pattern buffers instead, at a fixed cost for any pair)
 vec3 calculateTransition(vec2 uv, vec4 pos, float group_id, float progress) {
     // Check for specific pattern transitions with custom animations
     
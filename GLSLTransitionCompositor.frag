@@ -0,0 +1,86 @@
+// Transition compositor
+// Blends two pattern buffers rendered at LED resolution (one texel per LED)
+// with a transition kernel. Each GLSLAnimation instance only evaluates ONE
+// pattern, so the cost per LED is the same for any pair of patterns.
+//
+// Inputs:
+//   0 = "from" pattern buffer (GLSLAnimation instance with u_pattern = from)
+//   1 = "to" pattern buffer   (GLSLAnimation instance with u_pattern = to)
+//   2 = position map (R=angle, G=distance, B=bar ID, A=position along bar)
+//   3 = bar-group mapping texture (9x9, G = group number)
+//
+// Uniforms are driven by TransitionCompositor.py through the transition_uniforms table.
+
+uniform float u_progress;     // 0.0 (from) to 1.0 (to)
+uniform int u_kernel;         // 0=crossfade, 1=distance wipe, 2=angle wipe, 3=group order, 4=bar order
+uniform float u_softness;     // Width of the blend edge (0.0-1.0)
+uniform int u_reverse;        // 1 = run the wipe in the opposite direction
+uniform int u_total_bars;     // Total number of bars (TOTAL_BARS in TransitionCompositor.py)
+uniform int u_num_groups;     // Number of groups (NUM_GROUPS in TransitionCompositor.py)
+
+// Sample group data from the bar-group mapping texture (9x9 resolution)
+vec4 sampleGroupTexture(int bar_id) {
+    // Make sure bar_id is valid
+    bar_id = clamp(bar_id, 0, max(u_total_bars - 1, 0));
+
+    // Calculate row and column in the 9x9 texture
+    float row = floor(float(bar_id) / 9.0);
+    float col = mod(float(bar_id), 9.0);
+
+    // Sample at the pixel center
+    return texture(sTD2DInputs[3], vec2((col + 0.5) / 9.0, (row + 0.5) / 9.0));
+}
+
+// Kernel: order (0-1) in which this LED switches to the new pattern
+float transitionOrder(vec4 pos) {
+    float order;
+
+    if (u_kernel == 1) {
+        // Distance wipe - spreads out from the nose
+        order = pos.y;
+    }
+    else if (u_kernel == 2) {
+        // Angle wipe - sweeps around the head
+        order = pos.x;
+    }
+    else if (u_kernel == 3) {
+        // Group order - one facial feature after the other (groups are 1-based)
+        int group = int(sampleGroupTexture(int(pos.z)).g + 0.5);
+        order = float(max(group - 1, 0)) / float(max(u_num_groups - 1, 1));
+    }
+    else if (u_kernel == 4) {
+        // Bar order - bar by bar in bar ID order
+        order = float(int(pos.z)) / float(max(u_total_bars - 1, 1));
+    }
+    else {
+        // Crossfade - every LED at the same time
+        return 0.0;
+    }
+
+    if (u_reverse > 0) {
+        order = 1.0 - order;
+    }
+    return clamp(order, 0.0, 1.0);
+}
+
+out vec4 fragColor;
+
+void main() {
+    vec3 fromColor = texture(sTD2DInputs[0], vUV.st).rgb;
+    vec3 toColor = texture(sTD2DInputs[1], vUV.st).rgb;
+    vec4 posData = texture(sTD2DInputs[2], vUV.st);
+
+    float weight;
+    if (u_kernel == 0) {
+        // Plain crossfade
+        weight = u_progress;
+    } else {
+        // Wipe: the edge travels from order 0 to 1, stretched so both ends are fully covered
+        float softness = max(u_softness, 0.001);
+        float edge = u_progress * (1.0 + softness);
+        weight = clamp((edge - transitionOrder(posData)) / softness, 0.0, 1.0);
+        weight = smoothstep(0.0, 1.0, weight);
+    }
+
+    fragColor = vec4(mix(fromColor, toColor, weight), 1.0);
+}
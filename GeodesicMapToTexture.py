@@ -0,0 +1,36 @@
+# me is this DAT.
+# dat is the DAT that is cooking.
+def onCook(dat):
+    # Get position map data
+    position_map = op('CreatePositionMap')
+
+    # Find the geodesic distance columns (geo_nariz, geo_olhos, ...) - one texture channel each
+    header = [str(cell.val) for cell in position_map.row(0)]
+    geo_columns = [c for c, name in enumerate(header) if name.startswith('geo_')]
+
+    if len(geo_columns) > 4:
+        print(f"Warning: only the first 4 of {len(geo_columns)} geodesic seeds fit in the texture")
+        geo_columns = geo_columns[:4]
+
+    # Clear the existing data
+    dat.clear()
+
+    # Create header row with channel names
+    dat.appendRow(['r', 'g', 'b', 'a'])
+
+    # Same row order as PositionMapToTexture, so texel N matches in both textures
+    for i in range(1, position_map.numRows):
+        row = position_map.row(i)
+
+        # Normalized (0-1) distance along the bars from each seed group
+        values = [float(row[c].val) for c in geo_columns]
+
+        # Unused channels stay at 0
+        values += [0.0] * (4 - len(values))
+        dat.appendRow(values)
+
+    seeds = ', '.join(header[c][len('geo_'):] for c in geo_columns)
+    print(f"Geodesic map prepared with {dat.numRows-1} points (channels: {seeds})")
+
+    # IMPORTANT: Convert with the same DAT to TOP settings (32-bit float) as the position map,
+    # and assign the TOP to the sGeodesicMap sampler on the GLSL TOP's Samplers page
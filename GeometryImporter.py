@@ -0,0 +1,221 @@
+# Geometry importer for Lion LED system
+#
+# Loads LED geometry from the guide's led_positions.json format or from an OBJ
+# model straight into arrays, without going through the points/primitives DATs.
+#
+# Array representation (all numpy arrays, point indices are 0-based rows):
+#   positions     float32 (N, 3)  point positions
+#   point_groups  int32   (N,)    index into group_names for each point
+#   prim_ids      int32   (M,)    bar id of each primitive
+#   prim_offsets  int32   (M+1,)  prim i uses prim_vertices[prim_offsets[i]:prim_offsets[i+1]]
+#   prim_vertices int32   (K,)    point indices of all primitives, concatenated
+#   prim_closed   uint8   (M,)    1 if the primitive is closed
+#   prim_groups   int32   (M,)    index into group_names for each primitive
+#   group_names   list of str
+#
+# Parsed results are cached as .npy files keyed by a hash of the source file,
+# and loaded back memory-mapped so a restart does not re-parse the text.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Bump when the parsers change so old caches are not reused
+CACHE_VERSION = 2
+
+ARRAY_NAMES = ['positions', 'point_groups', 'prim_ids', 'prim_offsets',
+               'prim_vertices', 'prim_closed', 'prim_groups']
+
+
+def load_geometry(path, cache_dir=None, use_cache=True, log=None):
+    # Main entry point - returns the geometry dict for a .json or .obj file.
+    # log replaces debug_log, e.g. to collect messages when running in a worker thread.
+    if log is None:
+        log = debug_log
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+
+    key = source_hash(path)
+    entry = os.path.join(cache_dir, key)
+
+    if use_cache and os.path.isdir(entry):
+        geometry = read_cache(entry, log)
+        if geometry is not None:
+            log(f"Loaded geometry for {os.path.basename(path)} from cache ({len(geometry['positions'])} points)")
+            return geometry
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        geometry = parse_led_positions_json(path)
+    elif ext == '.obj':
+        geometry = parse_obj(path)
+    else:
+        raise ValueError(f"Unsupported geometry format: {ext}")
+
+    log(f"Parsed {len(geometry['positions'])} points and {len(geometry['prim_ids'])} primitives from {os.path.basename(path)}")
+
+    if use_cache:
+        write_cache(entry, geometry, path, log)
+    return geometry
+
+
+def source_hash(path):
+    # Hash of the file contents (and cache version) used as the cache key
+    digest = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir():
+    # Next to the .toe file when running inside TouchDesigner, else the working directory
+    try:
+        base = project.folder
+    except NameError:
+        base = os.getcwd()
+    return os.path.join(base, 'geometry_cache')
+
+
+def read_cache(entry, log=None):
+    # Load a cache entry memory-mapped; returns None if it is incomplete
+    if log is None:
+        log = debug_log
+    try:
+        with open(os.path.join(entry, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        geometry = {name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
+                    for name in ARRAY_NAMES}
+        geometry['group_names'] = meta['group_names']
+    except (OSError, ValueError, KeyError, TypeError):
+        log(f"Warning: ignoring broken geometry cache {entry}")
+        return None
+    return geometry
+
+
+def write_cache(entry, geometry, source_path, log=None):
+    # Write into a temporary folder first so a half-written entry is never read
+    if log is None:
+        log = debug_log
+    parent = os.path.dirname(entry)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    try:
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(geometry[name]))
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'source': os.path.abspath(source_path),
+                       'group_names': list(geometry['group_names'])}, f)
+        # A broken entry left by an older run would make the replace fail every time
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+    except OSError as e:
+        # Another process may have written the same entry in the meantime
+        shutil.rmtree(tmp, ignore_errors=True)
+        log(f"Warning: could not write geometry cache: {e}")
+    return
+
+
+def parse_led_positions_json(path):
+    # led_positions.json: bars with start/end points, pixels interpolated along each bar
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    bars = data['bars']
+    pixels_per_bar = int(data.get('pixels_per_bar', 50))
+    num_bars = len(bars)
+
+    starts = np.array([bar['start'] for bar in bars], dtype=np.float32).reshape(num_bars, 3)
+    ends = np.array([bar['end'] for bar in bars], dtype=np.float32).reshape(num_bars, 3)
+
+    # Pixel centers: the bar is split in pixels_per_bar equal cells, each pixel sits in the middle of its cell
+    t = ((np.arange(pixels_per_bar, dtype=np.float32) + 0.5) / pixels_per_bar)[np.newaxis, :, np.newaxis]
+    positions = (starts[:, np.newaxis, :] + (ends - starts)[:, np.newaxis, :] * t).reshape(-1, 3)
+
+    # Groups are optional in the guide's format
+    group_names = []
+    prim_groups = np.empty(num_bars, dtype=np.int32)
+    for i, bar in enumerate(bars):
+        name = str(bar.get('group', ''))
+        if name not in group_names:
+            group_names.append(name)
+        prim_groups[i] = group_names.index(name)
+
+    return {
+        'positions': positions,
+        'point_groups': np.repeat(prim_groups, pixels_per_bar),
+        'prim_ids': np.array([int(bar.get('index', i)) for i, bar in enumerate(bars)], dtype=np.int32),
+        'prim_offsets': np.arange(num_bars + 1, dtype=np.int32) * pixels_per_bar,
+        'prim_vertices': np.arange(num_bars * pixels_per_bar, dtype=np.int32),
+        'prim_closed': np.zeros(num_bars, dtype=np.uint8),
+        'prim_groups': prim_groups,
+        'group_names': group_names,
+    }
+
+
+def parse_obj(path):
+    # OBJ: 'v' lines are points, 'l' lines are bars (polylines), 'f' lines closed primitives.
+    # 'g' / 'o' lines set the group of the following primitives.
+    coords = []
+    prim_vertices = []
+    prim_offsets = [0]
+    prim_closed = []
+    prim_groups = []
+    group_names = ['']
+    current_group = 0
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('v '):
+                coords.append(line[2:])
+            elif line.startswith('l ') or line.startswith('f '):
+                num_points = len(coords)
+                for token in line[2:].split():
+                    # Strip texture/normal references (v/vt/vn)
+                    v = int(token.split('/', 1)[0])
+                    # OBJ indices are 1-based, negative values are relative to the end
+                    prim_vertices.append(v - 1 if v > 0 else num_points + v)
+                prim_offsets.append(len(prim_vertices))
+                prim_closed.append(1 if line[0] == 'f' else 0)
+                prim_groups.append(current_group)
+            elif line.startswith('g ') or line.startswith('o '):
+                name = line[2:].strip()
+                if name not in group_names:
+                    group_names.append(name)
+                current_group = group_names.index(name)
+
+    # Parse all coordinates in one go (only the first three values of each line)
+    positions = np.zeros((len(coords), 3), dtype=np.float32)
+    if coords:
+        values = [line.split()[:3] for line in coords]
+        positions[:] = np.array(values, dtype=np.float32)
+
+    prim_vertices = np.array(prim_vertices, dtype=np.int32)
+    prim_offsets = np.array(prim_offsets, dtype=np.int32)
+    prim_groups = np.array(prim_groups, dtype=np.int32)
+
+    # Points take the group of the (last) primitive that uses them
+    point_groups = np.zeros(len(positions), dtype=np.int32)
+    counts = np.diff(prim_offsets)
+    point_groups[prim_vertices] = np.repeat(prim_groups, counts)
+
+    return {
+        'positions': positions,
+        'point_groups': point_groups,
+        'prim_ids': np.arange(len(prim_groups), dtype=np.int32),
+        'prim_offsets': prim_offsets,
+        'prim_vertices': prim_vertices,
+        'prim_closed': np.array(prim_closed, dtype=np.uint8),
+        'prim_groups': prim_groups,
+        'group_names': group_names,
+    }
+
+
+def debug_log(message):
+    # Print to TextPort for debugging
+    print(message)
+    return
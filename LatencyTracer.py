@@ -0,0 +1,391 @@
+# Latency and jitter tracing harness for Lion LED system
+#
+# Follows events (a new u_pattern, a swap_with_current, a geometry edit...)
+# from their source through every pipeline stage to the Art-Net packet that
+# carries the resulting frame, and records when that packet arrives on a local
+# loopback receiver.
+#
+# Usage inside TouchDesigner (textport):
+#   import LatencyTracer
+#   LatencyTracer.start()                 # sender + loopback receiver on 127.0.0.1
+#   ... change patterns, swap bars, edit geometry ...
+#   LatencyTracer.tracer.print_report()
+#   LatencyTracer.stop()
+#
+# Sources call trace_begin('<source>'), stages call trace_stage('<stage>') and
+# the output calls send_frame(dmx). All of them do nothing until start() is
+# called, so the calls can stay in the show code.
+#
+# Some sources only reach the output after their own stages (a geometry edit has
+# to go through process_data and update_results first). Their traces stay pending
+# until those stages are stamped, and the per-frame output stages (render,
+# color_pipeline...) are only stamped on traces that are ready for the output.
+#
+# Standalone (synthetic load, no TouchDesigner):
+#   python LatencyTracer.py --fps 60 --seconds 10 --load-ms 5
+import socket
+import struct
+import threading
+import time
+
+ARTNET_PORT = 6454
+ARTNET_HEADER = b'Art-Net\x00'
+OP_DMX = 0x5000
+CHANNELS_PER_UNIVERSE = 510
+
+# Stages a source must go through before its trace can be bound to an output frame
+REQUIRED_STAGES = {
+    'geometry_edit': ['update_results'],
+}
+
+# Stages that only apply to some sources (all other stages apply to every ready trace)
+STAGE_SOURCES = {
+    'process_data': ['geometry_edit'],
+    'update_results': ['geometry_edit'],
+}
+
+
+def now_ns():
+    # Monotonic clock shared by the sender and the loopback receiver
+    return time.perf_counter_ns()
+
+
+def percentile(sorted_values, q):
+    # Linear interpolation percentile on an already sorted list
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(values_ms):
+    # Distribution summary in milliseconds
+    values = sorted(values_ms)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'min': values[0],
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': values[-1],
+    }
+
+
+class LatencyTracer:
+    """Keeps event timelines and packet arrival times, and reports latency/jitter."""
+
+    def __init__(self, max_history=10000):
+        self.enabled     = False
+        self.max_history = max_history
+        self.lock        = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets all traces and arrival times."""
+        with self.lock:
+            self.next_id   = 0
+            # Events not yet sent: trace_id -> trace
+            self.pending   = {}
+            # Frames sent but not fully received: sequence -> frame
+            self.in_flight = {}
+            # Finished traces and frame arrival times
+            self.completed = []
+            self.arrivals  = []
+            self.lost      = 0
+        return
+
+    def begin(self, source):
+        """Starts a trace at its source. Returns the trace id (or None when disabled)."""
+        if not self.enabled:
+            return None
+        t = now_ns()
+        with self.lock:
+            trace_id = self.next_id
+            self.next_id += 1
+            self.pending[trace_id] = {'id': trace_id, 'source': source, 'start': t, 'stages': []}
+        return trace_id
+
+    def stage(self, name, trace_ids=None):
+        """
+        Stamps a pipeline stage on the pending events it applies to, or only on
+        trace_ids when given (e.g. the edits a finished rig computation included).
+        """
+        if not self.enabled or not self.pending:
+            return
+        t = now_ns()
+        sources = STAGE_SOURCES.get(name)
+        with self.lock:
+            if trace_ids is None:
+                traces = self.pending.values()
+            else:
+                traces = [self.pending[i] for i in trace_ids if i in self.pending]
+            for trace in traces:
+                if sources is not None:
+                    if trace['source'] not in sources:
+                        continue
+                elif not self.ready(trace):
+                    # Output stages of a frame that cannot show this event yet
+                    continue
+                trace['stages'].append((name, t))
+        return
+
+    def ready(self, trace):
+        """True when the trace went through all stages its source needs before the output."""
+        stamped = [name for name, _ in trace['stages']]
+        return all(name in stamped for name in REQUIRED_STAGES.get(trace['source'], []))
+
+    def frame_sending(self, sequence, universes):
+        """Called right before the packets of a frame go out: binds the ready events to the frame."""
+        if not self.enabled:
+            return
+        t = now_ns()
+        with self.lock:
+            if sequence in self.in_flight:
+                # Sequence wrapped before the previous frame was fully received
+                self.lost += 1
+            traces = [trace for trace in self.pending.values() if self.ready(trace)]
+            for trace in traces:
+                del self.pending[trace['id']]
+                trace['stages'].append(('udp_send', t))
+            self.in_flight[sequence] = {'sent': t, 'waiting': set(universes), 'traces': traces}
+        return
+
+    def packet_received(self, universe, sequence, t):
+        """Called by the receiver thread for every packet that arrives."""
+        with self.lock:
+            frame = self.in_flight.get(sequence)
+            if frame is None:
+                return
+            frame['waiting'].discard(universe)
+            if frame['waiting']:
+                return
+            # Last universe of this frame arrived
+            del self.in_flight[sequence]
+            self.arrivals.append(t)
+            for trace in frame['traces']:
+                trace['stages'].append(('udp_receive', t))
+                trace['end'] = t
+                self.completed.append(trace)
+            # Keep memory bounded on long runs
+            del self.arrivals[:-self.max_history]
+            del self.completed[:-self.max_history]
+        return
+
+    def report(self):
+        """Latency per source, time spent per stage and frame-to-frame jitter (all in ms)."""
+        with self.lock:
+            completed = list(self.completed)
+            arrivals = list(self.arrivals)
+            lost = self.lost
+
+        latency = {}
+        stages = {}
+        for trace in completed:
+            latency.setdefault(trace['source'], []).append((trace['end'] - trace['start']) / 1e6)
+            previous = trace['start']
+            for name, t in trace['stages']:
+                stages.setdefault(name, []).append((t - previous) / 1e6)
+                previous = t
+
+        # Frame pacing: interval between consecutive frame arrivals and its deviation from the median
+        intervals = [(b - a) / 1e6 for a, b in zip(arrivals, arrivals[1:])]
+        median = percentile(sorted(intervals), 50)
+        jitter = [abs(i - median) for i in intervals]
+
+        return {
+            'latency': {source: summarize(values) for source, values in latency.items()},
+            'stages': {name: summarize(values) for name, values in stages.items()},
+            'frame_interval': summarize(intervals),
+            'jitter': summarize(jitter),
+            'lost_frames': lost,
+        }
+
+    def print_report(self):
+        """Prints the report to the TextPort."""
+        report = self.report()
+
+        def line(label, s):
+            if not s['count']:
+                return f"  {label:<24} no samples"
+            return (f"  {label:<24} n={s['count']:<6} mean={s['mean']:.3f} p50={s['p50']:.3f} "
+                    f"p95={s['p95']:.3f} p99={s['p99']:.3f} max={s['max']:.3f}")
+
+        print("End-to-end latency (ms):")
+        for source, s in sorted(report['latency'].items()):
+            print(line(source, s))
+        print("Time in stage, since previous stage (ms):")
+        for name, s in report['stages'].items():
+            print(line(name, s))
+        print("Frame pacing (ms):")
+        print(line('frame interval', report['frame_interval']))
+        print(line('jitter', report['jitter']))
+        print(f"  lost frames: {report['lost_frames']}")
+        return report
+
+
+class ArtNetSender:
+    """Sends DMX frames as ArtDmx packets, using the sequence field to match them on arrival."""
+
+    def __init__(self, host='127.0.0.1', port=ARTNET_PORT, first_universe=0):
+        self.address        = (host, port)
+        self.first_universe = first_universe
+        self.sequence       = 0
+        self.sock           = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send_frame(self, dmx):
+        """Sends one frame of DMX values (bytes-like, r g b r g b ...) split in universes."""
+        data = bytes(dmx)
+        # Art-Net sequence runs 1-255 (0 means sequencing disabled)
+        self.sequence = self.sequence % 255 + 1
+        offsets = range(0, len(data), CHANNELS_PER_UNIVERSE)
+        universes = [self.first_universe + offset // CHANNELS_PER_UNIVERSE for offset in offsets]
+        # Register the frame first, the receiver may get the packets before sendto returns
+        tracer.frame_sending(self.sequence, universes)
+        for offset, universe in zip(offsets, universes):
+            chunk = data[offset:offset + CHANNELS_PER_UNIVERSE]
+            # Length must be even
+            if len(chunk) % 2:
+                chunk += b'\x00'
+            packet = (ARTNET_HEADER + struct.pack('<H', OP_DMX) + struct.pack('>H', 14)
+                      + struct.pack('<BBH', self.sequence, 0, universe)
+                      + struct.pack('>H', len(chunk)) + chunk)
+            self.sock.sendto(packet, self.address)
+        return self.sequence
+
+    def close(self):
+        self.sock.close()
+        return
+
+
+class LoopbackReceiver(threading.Thread):
+    """Receives ArtDmx packets on the loopback interface and records their arrival times."""
+
+    def __init__(self, host='127.0.0.1', port=ARTNET_PORT):
+        super().__init__(name='LatencyTracerReceiver', daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                packet, _ = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            t = now_ns()
+            if len(packet) < 18 or not packet.startswith(ARTNET_HEADER):
+                continue
+            if struct.unpack_from('<H', packet, 8)[0] != OP_DMX:
+                continue
+            sequence, _, universe = struct.unpack_from('<BBH', packet, 12)
+            tracer.packet_received(universe, sequence, t)
+        return
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=1.0)
+        self.sock.close()
+        return
+
+
+# Shared tracer, sender and receiver
+tracer = LatencyTracer()
+sender = None
+receiver = None
+
+
+def start(host='127.0.0.1', port=ARTNET_PORT):
+    # Enable tracing and start the loopback receiver
+    global sender, receiver
+    stop()
+    tracer.reset()
+    receiver = LoopbackReceiver(host, port)
+    receiver.start()
+    sender = ArtNetSender(host, port)
+    tracer.enabled = True
+    print(f"Latency tracer listening on {host}:{port}")
+    return tracer
+
+
+def stop():
+    # Disable tracing and close the sockets (the collected data stays available)
+    global sender, receiver
+    tracer.enabled = False
+    if sender:
+        sender.close()
+        sender = None
+    if receiver:
+        receiver.stop()
+        receiver = None
+    return
+
+
+def trace_begin(source):
+    return tracer.begin(source)
+
+
+def trace_stage(name, trace_ids=None):
+    tracer.stage(name, trace_ids)
+    return
+
+
+def send_frame(dmx):
+    # Sends the frame through the traced sender when the harness is running
+    if sender is None or not tracer.enabled:
+        return None
+    return sender.send_frame(dmx)
+
+
+def run_synthetic(fps=60, seconds=10, load_ms=0.0, num_pixels=3650, event_every=10, port=ARTNET_PORT):
+    # Drives the output pipeline at a fixed frame rate with optional CPU load, outside TouchDesigner
+    import numpy as np
+    from OutputColorPipeline import OutputColorPipeline
+
+    start('127.0.0.1', port)
+    pipeline = OutputColorPipeline(num_pixels)
+    frame_time = 1.0 / fps
+    next_frame = time.perf_counter()
+    end = next_frame + seconds
+    frame = 0
+    try:
+        while next_frame < end:
+            if frame % event_every == 0:
+                trace_begin('u_pattern')
+            colors = np.random.rand(num_pixels, 3).astype(np.float32)
+            trace_stage('render')
+            # Simulated work of the rest of the show
+            busy_until = time.perf_counter() + load_ms / 1000.0
+            while time.perf_counter() < busy_until:
+                pass
+            trace_stage('load')
+            dmx = pipeline.process(colors)
+            trace_stage('color_pipeline')
+            send_frame(dmx)
+            frame += 1
+            next_frame += frame_time
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+        # Let the last packets arrive
+        time.sleep(0.1)
+    finally:
+        stop()
+    return tracer.print_report()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Lion LED latency and jitter harness')
+    parser.add_argument('--fps', type=float, default=60)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--load-ms', type=float, default=0.0)
+    parser.add_argument('--pixels', type=int, default=3650)
+    parser.add_argument('--port', type=int, default=ARTNET_PORT)
+    args = parser.parse_args()
+    run_synthetic(args.fps, args.seconds, args.load_ms, args.pixels, port=args.port)
@@ -0,0 +1,284 @@
+# me is this CHOP.
+# scriptOp is the Script CHOP that is cooking.
+#
+# Output color pipeline for the Lion LED system
+#
+# Sits between the final float colors of the LED render and the 8-bit DMX
+# output. The Source TOP parameter must point at the LAST TOP of the chain
+# (after the transition compositor and the bar remapper), so remapping and
+# inversion are applied and texels are in wire order for the current budget. Per frame it applies, for the whole rig at once:
+#   1) per-fixture gamma + white balance (precomputed 16-bit lookup tables)
+#   2) global brightness limit
+#   3) per-universe current budget (scales a universe down if it would draw too much)
+#   4) temporal dithering from 16-bit to 8-bit (error carried to the next frame)
+#
+# Everything is vectorized with numpy - there is no per-pixel Python.
+#
+# Settings come from the custom parameters on the Output page (brightness, gamma,
+# white balance, current per channel and budget per universe) and the optional
+# Fixtures DAT, with one row per fixture (all columns by name):
+#   name  gamma  white_r  white_g  white_b  first  last
+# Pixels first..last (inclusive, output order) use that fixture's gamma and white
+# balance; all other pixels use the parameters. They are re-applied on every cook,
+# so they survive the pipeline being recreated when the pixel count changes.
+import numpy as np
+
+import LatencyTracer
+
+# Size of the lookup tables (16-bit input and output)
+LUT_SIZE = 65536
+LUT_MAX = LUT_SIZE - 1
+
+# RGB pixels that fit in one DMX universe (3 x 170 = 510 channels)
+PIXELS_PER_UNIVERSE = 170
+
+
+class OutputColorPipeline:
+    """Converts float RGB frames into dithered, gamma corrected 8-bit DMX values."""
+
+    def __init__(self, num_pixels, pixels_per_universe=PIXELS_PER_UNIVERSE):
+        self.num_pixels          = int(num_pixels)
+        self.pixels_per_universe = int(pixels_per_universe)
+        # Universe of each pixel (pixels are packed in output order)
+        self.pixel_universe      = np.arange(self.num_pixels) // self.pixels_per_universe
+        self.num_universes       = int(self.pixel_universe[-1]) + 1 if self.num_pixels else 0
+        # Fixture profiles: every pixel points to one profile (one LUT per profile and channel)
+        self.profiles            = []
+        self.pixel_profile       = np.zeros(self.num_pixels, dtype=np.intp)
+        self.luts                = np.zeros((0, 3, LUT_SIZE), dtype=np.uint16)
+        # Brightness limit (0-1) applied after the LUTs
+        self.brightness          = 1.0
+        # Current model: mA drawn by each channel at full level, and budget per universe in mA
+        self.channel_current     = np.array([20.0, 20.0, 20.0])
+        self.universe_budget     = np.full(self.num_universes, np.inf)
+        # Temporal dithering state (fractional 8-bit remainder carried between frames)
+        self.dither              = True
+        self.residual            = np.zeros((self.num_pixels, 3), dtype=np.float32)
+        # Scale applied by the current limiter on the last frame (1.0 = not limited)
+        self.universe_scale      = np.ones(self.num_universes)
+        self.add_profile('default')
+
+    def add_profile(self, name, gamma=2.2, white_balance=(1.0, 1.0, 1.0)):
+        """Adds (or replaces) a fixture profile and rebuilds its lookup tables."""
+        gamma = np.broadcast_to(np.asarray(gamma, dtype=np.float64), (3,))
+        white_balance = np.broadcast_to(np.clip(np.asarray(white_balance, dtype=np.float64), 0.0, 1.0), (3,))
+
+        # One 16-bit in -> 16-bit out table per channel
+        ramp = np.linspace(0.0, 1.0, LUT_SIZE)
+        tables = np.empty((3, LUT_SIZE), dtype=np.uint16)
+        for c in range(3):
+            tables[c] = np.rint(np.power(ramp, gamma[c]) * white_balance[c] * LUT_MAX)
+
+        if name in self.profiles:
+            index = self.profiles.index(name)
+            self.luts[index] = tables
+        else:
+            index = len(self.profiles)
+            self.profiles.append(name)
+            self.luts = np.concatenate([self.luts, tables[np.newaxis]])
+        return index
+
+    def assign_profile(self, name, pixel_indices):
+        """Assigns a fixture profile to a set of pixels (e.g. all pixels of some bars)."""
+        if name not in self.profiles:
+            debug_log(f"Warning: fixture profile '{name}' not found")
+            return False
+        self.pixel_profile[np.asarray(pixel_indices, dtype=np.intp)] = self.profiles.index(name)
+        return True
+
+    def set_current_budget(self, budget_ma, universe=None):
+        """Sets the current budget (mA) of one universe, or of all universes if universe is None."""
+        if universe is None:
+            self.universe_budget[:] = budget_ma
+        else:
+            self.universe_budget[universe] = budget_ma
+        return True
+
+    def process(self, colors):
+        """
+        Converts a (num_pixels, 3) or (num_pixels, 4) float array in 0-1
+        to a (num_pixels, 3) uint8 array ready for DMX.
+        """
+        rgb = np.asarray(colors, dtype=np.float32)[:self.num_pixels, :3]
+
+        # 1) Quantize to 16-bit and run through the per-fixture LUTs
+        index = np.rint(np.clip(rgb, 0.0, 1.0) * LUT_MAX).astype(np.intp)
+        profile = self.pixel_profile[:, np.newaxis]
+        channel = np.arange(3)[np.newaxis, :]
+        levels = self.luts[profile, channel, index].astype(np.float32)
+
+        # 2) Global brightness limit
+        levels *= self.brightness
+
+        # 3) Per-universe current limiting
+        pixel_current = levels @ (self.channel_current / LUT_MAX).astype(np.float32)
+        universe_current = np.bincount(self.pixel_universe, weights=pixel_current,
+                                       minlength=self.num_universes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(universe_current > self.universe_budget,
+                             self.universe_budget / universe_current, 1.0)
+        self.universe_scale = scale
+        levels *= scale[self.pixel_universe].astype(np.float32)[:, np.newaxis]
+
+        # 4) 16-bit -> 8-bit, carrying the rounding error into the next frame
+        levels *= 255.0 / LUT_MAX
+        if self.dither:
+            levels += self.residual
+            out = np.floor(levels)
+            self.residual = levels - out
+        else:
+            out = np.rint(levels)
+
+        return np.clip(out, 0, 255).astype(np.uint8)
+
+
+# Pipeline instance (kept between cooks)
+pipeline = None
+
+# Gamma / white balance / fixtures last turned into LUTs (None = not applied yet)
+applied_profiles = None
+
+
+def onSetupParameters(scriptOp):
+    # TOP with the final LED colors (one texel per LED, in wire order)
+    page = scriptOp.appendCustomPage('Output')
+    source = page.appendTOP('Sourcetop', label='Source TOP')
+    source.default = 'GLSLTransitionCompositor'
+    source.val = 'GLSLTransitionCompositor'
+
+    # Global brightness limit (0-1)
+    brightness = page.appendFloat('Brightness', label='Brightness')[0]
+    brightness.default = 1.0
+    brightness.val = 1.0
+    brightness.clampMin = True
+    brightness.clampMax = True
+    brightness.min = brightness.normMin = 0.0
+    brightness.max = brightness.normMax = 1.0
+
+    # Default fixture profile (pixels not listed in the Fixtures DAT)
+    gamma = page.appendFloat('Gamma', label='Gamma')[0]
+    gamma.default = 2.2
+    gamma.val = 2.2
+    gamma.clampMin = True
+    gamma.min = 0.1
+    gamma.normMin = 1.0
+    gamma.normMax = 3.0
+    white_balance = page.appendRGB('Whitebalance', label='White Balance')
+    for par in white_balance:
+        par.default = 1.0
+        par.val = 1.0
+
+    # Current model: mA per channel at full level, and budget per universe (0 = unlimited)
+    current = page.appendFloat('Channelcurrent', label='Current per Channel (mA)')[0]
+    current.default = 20.0
+    current.val = 20.0
+    current.normMax = 60.0
+    budget = page.appendFloat('Budget', label='Budget per Universe (mA)')[0]
+    budget.default = 0.0
+    budget.val = 0.0
+    budget.clampMin = True
+    budget.min = 0.0
+    budget.normMax = 10000.0
+
+    dither = page.appendToggle('Dither', label='Temporal Dithering')[0]
+    dither.default = True
+    dither.val = True
+
+    # Optional per-fixture profiles (see the table format at the top of this file)
+    page.appendDAT('Fixturesdat', label='Fixtures DAT')
+    return
+
+
+def apply_parameters(scriptOp):
+    # Push the custom parameters and fixtures table into the pipeline.
+    # The LUTs are only rebuilt when the profiles changed (or the pipeline is new).
+    global applied_profiles
+    par = scriptOp.par
+
+    pipeline.brightness = float(par.Brightness.eval())
+    pipeline.dither = bool(par.Dither.eval())
+    pipeline.channel_current[:] = float(par.Channelcurrent.eval())
+    budget = float(par.Budget.eval())
+    pipeline.set_current_budget(budget if budget > 0 else np.inf)
+
+    fixtures = par.Fixturesdat.eval()
+    rows = [[cell.val for cell in row] for row in fixtures.rows()] if fixtures else []
+    profiles = (float(par.Gamma.eval()),
+                (float(par.Whitebalancer.eval()), float(par.Whitebalanceg.eval()), float(par.Whitebalanceb.eval())),
+                rows)
+    if profiles == applied_profiles:
+        return
+    applied_profiles = profiles
+
+    gamma, white_balance, rows = profiles
+    pipeline.add_profile('default', gamma, white_balance)
+    pipeline.pixel_profile[:] = 0
+    if not rows:
+        return
+
+    columns = {name: c for c, name in enumerate(rows[0])}
+    missing = [name for name in ['name', 'first', 'last'] if name not in columns]
+    if missing:
+        debug_log(f"Warning: fixtures table is missing columns {', '.join(missing)}")
+        return
+
+    def value(row, name, default):
+        # Optional columns fall back to the parameter values
+        c = columns.get(name)
+        return float(row[c]) if c is not None and row[c] != '' else default
+
+    for row in rows[1:]:
+        try:
+            name = row[columns['name']]
+            pipeline.add_profile(name, value(row, 'gamma', gamma),
+                                 (value(row, 'white_r', white_balance[0]),
+                                  value(row, 'white_g', white_balance[1]),
+                                  value(row, 'white_b', white_balance[2])))
+            first = max(int(row[columns['first']]), 0)
+            last = min(int(row[columns['last']]), pipeline.num_pixels - 1)
+        except ValueError:
+            debug_log(f"Warning: skipping invalid fixture row {row}")
+            continue
+        pipeline.assign_profile(name, np.arange(first, last + 1))
+    debug_log(f"Output color pipeline: {len(pipeline.profiles)} fixture profiles applied")
+    return
+
+
+def onCook(scriptOp):
+    # Read the rendered LED colors (one texel per LED)
+    global pipeline, applied_profiles
+    source = scriptOp.par.Sourcetop.eval()
+    if source is None:
+        debug_log("Warning: output color pipeline has no Source TOP")
+        return
+    # The delayed download returns last frame's image; while the latency harness is
+    # running, download this frame so traced events are bound to the packet showing them
+    frame = source.numpyArray(delayed=not LatencyTracer.tracer.enabled)
+    colors = frame.reshape(-1, frame.shape[-1])
+
+    # Rebuild the pipeline if the rig size changed (settings are re-applied below)
+    if pipeline is None or pipeline.num_pixels != len(colors):
+        pipeline = OutputColorPipeline(len(colors))
+        applied_profiles = None
+        debug_log(f"Output color pipeline created for {len(colors)} pixels in {pipeline.num_universes} universes")
+    apply_parameters(scriptOp)
+
+    LatencyTracer.trace_stage('render')
+    dmx = pipeline.process(colors)
+    LatencyTracer.trace_stage('color_pipeline')
+
+    # One channel with all DMX values in output order (r, g, b, r, g, b, ...)
+    scriptOp.clear()
+    scriptOp.numSamples = dmx.size
+    chan = scriptOp.appendChan('dmx')
+    chan.numpyArray()[:] = dmx.ravel()
+
+    # Traced Art-Net copy of the frame (only while the latency harness is running)
+    LatencyTracer.send_frame(dmx)
+    return
+
+
+def debug_log(message):
+    # Print to TextPort for debugging
+    print(message)
+    return
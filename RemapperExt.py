@@ -6,6 +6,13 @@ num network TouchDesigner. Ajuda a sincronizar índices de software com o
 hardware e a tratar inversões de barras.
 """
 
+try:
+    from LatencyTracer import trace_begin
+except ImportError:
+    # Harness de latência não disponível neste componente
+    def trace_begin(source):
+        return None
+
 class LEDBarRemapper:
     def __init__(self, ownerComp):
         # Operador que detém esta extensão
@@ -304,6 +311,7 @@ class LEDBarRemapper:
         """
         Troca a barra atual (CurrentBarIndex) com o índice correto fornecido.
         """
+        trace_begin('swap_with_current')
         chop = op(self.ownerComp.par.Currentbarindex.eval())
         if not chop:
             self.log_message("Error: Current bar index CHOP not found")
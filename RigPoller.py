@@ -0,0 +1,15 @@
+# me - this DAT.
+#
+# frame - the current frame
+#
+# Make sure the Frame Start toggle is enabled in the Execute DAT.
+#
+# Rig poller for Lion LED system
+#
+# DataProcessor.process_rigs() only starts the rig computations on the worker
+# pool; this writes each rig's results back to its tables as soon as it is done.
+
+
+def onFrameStart(frame):
+    op('DataProcessor').module.poll_rigs()
+    return
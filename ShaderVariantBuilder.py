@@ -0,0 +1,526 @@
+# me - this DAT.
+#
+# frame - the current frame
+#
+# Make sure the Frame End toggle (benchmark) is enabled in the Execute DAT.
+#
+# Shader variant builder for Lion LED system
+#
+# GLSLAnimation.frag is an uber-shader: every fragment walks the u_pattern
+# chain, the eyes/teeth overrides and the texture-mix branches, and register
+# allocation is sized for the largest pattern. This module splits the shader
+# into its function library and generates small specialized variants, each
+# containing only the functions one combination needs:
+#   pattern (u_pattern), transition (u_from_pattern -> u_to_pattern),
+#   eyes override, teeth override and texture mix mode.
+#
+# Variants are cached by key (in memory and in shader_cache/ on disk) and the
+# matching one is selected every frame for the GLSL TOPs in AUTO_SELECT_TOPS,
+# by pointing the TOP at its DAT whenever its uniforms ask for another variant.
+# update_variants() is called by TransitionCompositor.apply() right after it
+# writes the uniforms, so a variant never renders last frame's pattern.
+#
+# Build step (outside TouchDesigner):
+#   python ShaderVariantBuilder.py                 # all pattern/feature variants
+#   python ShaderVariantBuilder.py --transitions   # plus every transition pair
+import hashlib
+import os
+import re
+
+# Uber-shader this module specializes
+SOURCE_FILE = 'GLSLAnimation.frag'
+
+# Types that can start a top-level function definition
+FUNCTION_START = re.compile(r'^(?:void|bool|int|float|vec[234]|ivec[234]|mat[234])\s+(\w+)\s*\([^;{]*\)\s*\{',
+                            re.MULTILINE)
+CALL = re.compile(r'\b(\w+)\s*\(')
+PATTERN_CASE = re.compile(r'u_pattern == (\d+)\)\s*\{\s*procColor = (\w+)\(')
+TRANSITION_CASE = re.compile(r'u_from_pattern == (\d+) && u_to_pattern == (\d+)\)\s*\{\s*return (\w+)\(')
+
+# Pattern used by the uber-shader for unknown u_pattern values
+FALLBACK_PATTERN = 'animateWave'
+
+
+class ShaderLibrary:
+    """The uber-shader split into its prelude (uniforms, constants) and functions."""
+
+    def __init__(self, source):
+        self.source    = source.lstrip('﻿')
+        self.hash      = hashlib.sha1(self.source.encode('utf-8')).hexdigest()[:12]
+        self.prelude   = ''
+        # name -> full text (leading comments + definition)
+        self.functions = {}
+        # name -> names of library functions it calls
+        self.calls     = {}
+        self.parse()
+        # u_pattern -> function, (from, to) -> custom transition function
+        self.patterns    = {int(n): name for n, name in PATTERN_CASE.findall(self.functions.get('main', ''))}
+        self.transitions = {(int(a), int(b)): name for a, b, name in
+                            TRANSITION_CASE.findall(self.functions.get('calculateTransition', ''))}
+
+    def parse(self):
+        # Split the source at each top-level function, keeping comments with the function below them
+        text = self.source
+        matches = list(FUNCTION_START.finditer(text))
+        if not matches:
+            raise ValueError("No functions found in shader source")
+
+        previous_end = 0
+        for match in matches:
+            if match.start() < previous_end:
+                # Nested match inside a function body (should not happen at column 0)
+                continue
+            name = match.group(1)
+            end = find_block_end(text, match.end() - 1)
+            leading = text[previous_end:match.start()]
+
+            if previous_end == 0:
+                # Everything before the first function is the prelude
+                self.prelude = leading
+                leading = ''
+            else:
+                # Top-level declarations between functions (e.g. 'out vec4 fragColor;') are regenerated
+                leading = '\n'.join(line for line in leading.split('\n')
+                                    if not line.strip() or line.strip().startswith('//'))
+            self.functions[name] = leading + text[match.start():end]
+            previous_end = end
+
+        for name, body in self.functions.items():
+            self.calls[name] = {call for call in CALL.findall(strip_comments(body))
+                                if call in self.functions and call != name}
+        return
+
+    def dependencies(self, roots):
+        """All functions needed by the given root functions, in source order."""
+        needed = set()
+        stack = list(roots)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            stack.extend(self.calls.get(name, ()))
+        return [name for name in self.functions if name in needed]
+
+    def pattern_function(self, pattern):
+        return self.patterns.get(pattern, FALLBACK_PATTERN)
+
+
+def find_block_end(text, open_brace):
+    # Index just past the brace matching text[open_brace], skipping comments
+    depth = 0
+    i = open_brace
+    while i < len(text):
+        if text.startswith('//', i):
+            i = text.find('\n', i)
+            if i < 0:
+                break
+            continue
+        if text.startswith('/*', i):
+            i = text.find('*/', i) + 2
+            continue
+        ch = text[i]
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError("Unbalanced braces in shader source")
+
+
+def strip_comments(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+    return re.sub(r'//[^\n]*', '', text)
+
+
+def variant_key(pattern=0, transition=None, eyes=0, teeth=0, texture_mix=0):
+    # Normalized key - combinations that render the same shader get the same key
+    texture_mix = texture_mix if texture_mix in (0, 1, 2) else 0
+    if texture_mix == 2:
+        # Texture only: the pattern and transition are never visible
+        pattern, transition = -1, None
+    elif transition is not None:
+        # During a transition u_pattern is ignored
+        pattern = -1
+    trans = f"{transition[0]}-{transition[1]}" if transition is not None else 'none'
+    return f"p{pattern}_t{trans}_e{1 if eyes else 0}_k{1 if teeth else 0}_m{texture_mix}"
+
+
+def parse_key(key):
+    # Inverse of variant_key
+    p, t, e, k, m = key.split('_')
+    transition = None if t == 'tnone' else tuple(int(v) for v in t[1:].split('-'))
+    return int(p[1:]), transition, int(e[1:]), int(k[1:]), int(m[1:])
+
+
+def generate_variant(library, key):
+    # Build the specialized shader source for a variant key
+    pattern, transition, eyes, teeth, texture_mix = parse_key(key)
+    args = 'vUV.st, posData, group_id'
+
+    roots = ['sampleGroupTexture']
+    body = []
+
+    if texture_mix != 2:
+        if transition is None:
+            fn = library.pattern_function(pattern)
+            roots.append(fn)
+            body.append(f"    vec3 procColor = {fn}({args});")
+        elif transition in library.transitions:
+            fn = library.transitions[transition]
+            roots.append(fn)
+            body.append(f"    vec3 procColor = {fn}({args}, u_transition_progress);")
+        else:
+            # Specialized crossfade: only the two patterns involved
+            from_fn = library.pattern_function(transition[0])
+            to_fn = library.pattern_function(transition[1])
+            roots += [from_fn, to_fn]
+            body.append(f"    vec3 procColor = mix({from_fn}({args}), {to_fn}({args}), u_transition_progress);")
+
+        if eyes:
+            roots.append('animateEyes')
+            body += ["    if (group == EYES_GROUP) {",
+                     f"        procColor = animateEyes({args});",
+                     "    }"]
+        if teeth:
+            roots.append('animateTeeth')
+            body += ["    if (group == TEETH_GROUP) {",
+                     f"        procColor = animateTeeth({args});",
+                     "    }"]
+
+    if texture_mix == 0:
+        body.append("    vec3 finalColor = procColor;")
+    elif texture_mix == 1:
+        roots.append('sampleTexture')
+        body.append("    vec3 finalColor = mix(procColor, sampleTexture(posData), u_blend_amount);")
+    else:
+        roots.append('sampleTexture')
+        body.append("    vec3 finalColor = sampleTexture(posData);")
+
+    functions = '\n'.join(library.functions[name].strip('\n') + '\n' for name in library.dependencies(roots))
+
+    return '\n'.join([
+        f"// Generated by ShaderVariantBuilder from {SOURCE_FILE} ({library.hash}) - do not edit",
+        f"// Variant: {key}",
+        library.prelude.rstrip(),
+        '',
+        functions,
+        "out vec4 fragColor;",
+        "",
+        "void main() {",
+        "    vec4 posData = texture(sTD2DInputs[0], vUV.st);",
+        "    vec4 groupData = sampleGroupTexture(int(posData.z));",
+        "    float group_id = groupData.g;",
+        "    int group = int(group_id + 0.5);",
+        "",
+        *body,
+        "",
+        "    fragColor = vec4(finalColor, 1.0);",
+        "}",
+        ""
+    ])
+
+
+class VariantCache:
+    """Generated variants by key, in memory and on disk (invalidated when the uber-shader changes)."""
+
+    def __init__(self, library, cache_dir=None):
+        self.library   = library
+        self.cache_dir = cache_dir
+        self.variants  = {}
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}_{self.library.hash}.frag")
+
+    def get(self, key):
+        """Returns the source of a variant, generating it on first use."""
+        if key in self.variants:
+            return self.variants[key]
+
+        source = None
+        if self.cache_dir and os.path.isfile(self.path(key)):
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                source = f.read()
+        if source is None:
+            source = generate_variant(self.library, key)
+            if self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self.path(key), 'w', encoding='utf-8') as f:
+                    f.write(source)
+
+        self.variants[key] = source
+        return source
+
+    def build_all(self, transitions=False):
+        """Pre-generates every pattern/feature variant (and optionally every transition pair)."""
+        patterns = sorted(self.library.patterns)
+        keys = set()
+        for eyes in (0, 1):
+            for teeth in (0, 1):
+                for texture_mix in (0, 1, 2):
+                    for pattern in patterns:
+                        keys.add(variant_key(pattern, None, eyes, teeth, texture_mix))
+                    if transitions:
+                        for a in patterns:
+                            for b in patterns:
+                                if a != b:
+                                    keys.add(variant_key(a, (a, b), eyes, teeth, texture_mix))
+        for key in sorted(keys):
+            self.get(key)
+        return sorted(keys)
+
+
+def read_source(path=None):
+    # Uber-shader text from its DAT inside TouchDesigner, or from the file next to this module
+    try:
+        dat = op(os.path.splitext(SOURCE_FILE)[0])
+        if dat:
+            return dat.text
+    except NameError:
+        pass
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SOURCE_FILE)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def load_library(path=None):
+    return ShaderLibrary(read_source(path))
+
+
+def default_cache_dir():
+    try:
+        base = project.folder
+    except NameError:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, 'shader_cache')
+
+
+# Runtime selection
+
+# GLSL TOPs whose variant follows their uniforms every frame (missing ones are skipped)
+AUTO_SELECT_TOPS = ['GLSLAnimationFrom', 'GLSLAnimationTo']
+
+cache = None
+cache_source = None
+
+# TOP path -> (key, library hash) of the variant it currently uses
+selected = {}
+
+
+def get_cache():
+    # Variant cache for the current uber-shader text (rebuilt when the source DAT is edited)
+    global cache, cache_source
+    source = read_source()
+    if cache is None or source != cache_source:
+        cache = VariantCache(ShaderLibrary(source), default_cache_dir())
+        cache_source = source
+    return cache
+
+
+def update_variants():
+    # Reselect the variant of every auto-selected TOP whose uniforms changed
+    if benchmark is not None and not benchmark.finished:
+        return
+    library_hash = get_cache().library.hash
+    for name in AUTO_SELECT_TOPS:
+        glsl_top = op(name)
+        if glsl_top is None:
+            continue
+        key = current_key(glsl_top)
+        if selected.get(glsl_top.path) != (key, library_hash):
+            select_variant(glsl_top, key)
+    return
+
+
+def current_key(glsl_top):
+    # Variant key for the uniform values currently set on the uber GLSL TOP
+    uniforms = read_uniforms(glsl_top)
+    transition = None
+    if int(uniforms.get('u_enable_transition', 0)) > 0:
+        transition = (int(uniforms.get('u_from_pattern', 0)), int(uniforms.get('u_to_pattern', 0)))
+    return variant_key(int(uniforms.get('u_pattern', 0)), transition,
+                       int(uniforms.get('u_eyes_override', 0)) > 0,
+                       int(uniforms.get('u_teeth_override', 0)) > 0,
+                       int(uniforms.get('u_texture_mix', 0)))
+
+
+def read_uniforms(glsl_top):
+    # GLSL TOP uniforms live in the numbered uniname/value parameter blocks
+    uniforms = {}
+    for par in glsl_top.pars('uniname*'):
+        if not par.eval():
+            continue
+        index = par.name[len('uniname'):]
+        value = getattr(glsl_top.par, f"value{index}x", None)
+        if value is not None:
+            uniforms[par.eval()] = value.eval()
+    return uniforms
+
+
+def select_variant(glsl_top, key=None):
+    # Point the GLSL TOP at the variant DAT for the given (or current) key
+    variants = get_cache()
+    library_hash = variants.library.hash
+    if key is None:
+        key = current_key(glsl_top)
+
+    # The library hash is part of the name, so DATs from an older uber-shader
+    # (also ones saved in the .toe) are never reused
+    name = f"variant_{key.replace('-', '_')}_{library_hash}"
+    parent = glsl_top.parent()
+    dat = parent.op(name)
+    if dat is None:
+        dat = parent.create(textDAT, name)
+        dat.text = variants.get(key)
+        dat.viewer = False
+    if glsl_top.par.pixeldat.eval() != dat:
+        glsl_top.par.pixeldat = dat.name
+        print(f"Shader variant selected: {key}")
+    selected[glsl_top.path] = (key, library_hash)
+    remove_stale_variants(parent, library_hash)
+    return key
+
+
+def remove_stale_variants(parent, library_hash):
+    # Delete variant DATs of older uber-shader versions that no GLSL TOP uses any more
+    in_use = {top.par.pixeldat.eval() for top in parent.findChildren(type=glslTOP, depth=1)}
+    for dat in parent.findChildren(name='variant_*', depth=1):
+        if not dat.name.endswith(library_hash) and dat not in in_use:
+            dat.destroy()
+    return
+
+
+def select_uber(glsl_top):
+    # Back to the full uber-shader
+    glsl_top.par.pixeldat = os.path.splitext(SOURCE_FILE)[0]
+    selected.pop(glsl_top.path, None)
+    return
+
+
+# Benchmark (uber-shader vs variant GPU frame time)
+
+class VariantBenchmark:
+    """Alternates the GLSL TOP between the uber-shader and variants and records GPU cook times."""
+
+    def __init__(self, glsl_top, keys, frames_per_run=120, warmup_frames=10):
+        self.glsl_top       = glsl_top
+        self.keys           = list(keys)
+        self.frames_per_run = frames_per_run
+        self.warmup_frames  = warmup_frames
+        # Runs: (key, 'uber'|'variant'), and samples in ms per run
+        self.runs           = [(key, mode) for key in self.keys for mode in ('uber', 'variant')]
+        self.samples        = {run: [] for run in self.runs}
+        self.run_index      = -1
+        self.frame          = 0
+        self.finished       = False
+        self.next_run()
+
+    def next_run(self):
+        self.run_index += 1
+        self.frame = 0
+        if self.run_index >= len(self.runs):
+            self.finished = True
+            select_uber(self.glsl_top)
+            self.print_report()
+            return
+        key, mode = self.runs[self.run_index]
+        # Both modes render the same combination: uniforms are set the same way
+        apply_key_uniforms(self.glsl_top, key)
+        if mode == 'uber':
+            select_uber(self.glsl_top)
+        else:
+            select_variant(self.glsl_top, key)
+        return
+
+    def step(self):
+        """Call once per frame (onFrameEnd)."""
+        if self.finished:
+            return
+        self.frame += 1
+        if self.frame > self.warmup_frames:
+            self.samples[self.runs[self.run_index]].append(self.glsl_top.gpuCookTime)
+        if self.frame >= self.warmup_frames + self.frames_per_run:
+            self.next_run()
+        return
+
+    def report(self):
+        """Mean and p95 GPU time (ms) per key for both modes, and the speedup."""
+        results = {}
+        for key in self.keys:
+            row = {}
+            for mode in ('uber', 'variant'):
+                values = sorted(self.samples[(key, mode)])
+                if values:
+                    row[mode] = {'mean': sum(values) / len(values),
+                                 'p95': values[int(0.95 * (len(values) - 1))]}
+            if 'uber' in row and 'variant' in row and row['variant']['mean'] > 0:
+                row['speedup'] = row['uber']['mean'] / row['variant']['mean']
+            results[key] = row
+        return results
+
+    def print_report(self):
+        print("Shader variant benchmark (GPU ms per frame):")
+        for key, row in self.report().items():
+            if 'speedup' not in row:
+                print(f"  {key:<28} incomplete")
+                continue
+            print(f"  {key:<28} uber mean={row['uber']['mean']:.3f} p95={row['uber']['p95']:.3f}  "
+                  f"variant mean={row['variant']['mean']:.3f} p95={row['variant']['p95']:.3f}  "
+                  f"x{row['speedup']:.2f}")
+        return
+
+
+def apply_key_uniforms(glsl_top, key):
+    # Set the uber-shader uniforms that correspond to a variant key
+    pattern, transition, eyes, teeth, texture_mix = parse_key(key)
+    values = {
+        'u_pattern': max(pattern, 0),
+        'u_enable_transition': 1 if transition else 0,
+        'u_from_pattern': transition[0] if transition else 0,
+        'u_to_pattern': transition[1] if transition else 0,
+        'u_eyes_override': eyes,
+        'u_teeth_override': teeth,
+        'u_texture_mix': texture_mix
+    }
+    for par in glsl_top.pars('uniname*'):
+        if par.eval() in values:
+            index = par.name[len('uniname'):]
+            setattr(glsl_top.par, f"value{index}x", values[par.eval()])
+    return
+
+
+benchmark = None
+
+
+def start_benchmark(glsl_top, keys=None, frames_per_run=120):
+    # Benchmark the given keys (default: every pattern without features)
+    global benchmark
+    if keys is None:
+        keys = [variant_key(p) for p in sorted(load_library().patterns)]
+    benchmark = VariantBenchmark(glsl_top, keys, frames_per_run)
+    return benchmark
+
+
+def onFrameEnd(frame):
+    if benchmark is not None and not benchmark.finished:
+        benchmark.step()
+    return
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate specialized GLSLAnimation shader variants')
+    parser.add_argument('--transitions', action='store_true', help='also build every transition pair')
+    parser.add_argument('--out', default=None, help='cache folder (default: shader_cache next to this file)')
+    args = parser.parse_args()
+
+    library = load_library()
+    builder = VariantCache(library, args.out or default_cache_dir())
+    keys = builder.build_all(args.transitions)
+    uber_lines = library.source.count('\n') + 1
+    sizes = [builder.get(key).count('\n') + 1 for key in keys]
+    print(f"Built {len(keys)} variants from {SOURCE_FILE} ({uber_lines} lines) into {builder.cache_dir}")
+    print(f"Variant size: {min(sizes)}-{max(sizes)} lines (mean {sum(sizes) / len(sizes):.0f})")
@@ -0,0 +1,230 @@
+# me - this DAT.
+#
+# frame - the current frame
+#
+# Make sure the Frame Start toggle is enabled in the Execute DAT.
+#
+# Transition compositor for Lion LED system
+#
+# Replaces the hardcoded calculateTransition pairs in GLSLAnimation.frag.
+# Two GLSLAnimation instances render the "from" and "to" patterns at LED
+# resolution, and GLSLTransitionCompositor.frag blends them with a kernel
+# picked from the TRANSITIONS table below. Transitions can be queued, so a
+# multi-step sequence (e.g. wave -> roaring -> group sequence) plays in order.
+#
+# Uniform values are written to the 'transition_uniforms' table (name, value);
+# the GLSL TOP parameters reference it, e.g. op('transition_uniforms')['u_progress', 1]
+# Both GLSLAnimation instances must keep u_enable_transition = 0; their u_pattern
+# come from the from_pattern / to_pattern rows, and the compositor also reads
+# u_total_bars / u_num_groups from the table. The "from" instance is bypassed
+# while no transition runs, so only one pattern renders in steady state.
+import LatencyTracer
+
+
+def onFrameStart(frame):
+    compositor.update(absTime.stepSeconds)
+    compositor.apply()
+    return
+
+
+# Pattern numbers used by GLSLAnimation.frag (u_pattern)
+PATTERNS = {
+    'wave': 0,
+    'breathing': 1,
+    'group_sequence': 2,
+    'roaring': 3,
+    'glitter': 4,
+    'bar_pattern': 5,
+    'random_bars': 6,
+    'single_bar': 7,
+    'symmetrical_pulse': 8,
+    'vertical_cascade': 9,
+    'symmetrical_chase': 10,
+    'axis_ripple': 11,
+    'nose_lines': 12,
+    'group_highlight': 13,
+    'debug_groups': 14,
+    'anatomical_expression': 15
+}
+
+# Rig size used by the group and bar order kernels (u_total_bars / u_num_groups)
+TOTAL_BARS = 69
+NUM_GROUPS = 7
+
+# Transition kernels implemented in GLSLTransitionCompositor.frag (u_kernel)
+KERNELS = {
+    'crossfade': 0,
+    'distance': 1,
+    'angle': 2,
+    'group': 3,
+    'bar': 4
+}
+
+# Transition used for any pair not listed in TRANSITIONS
+DEFAULT_TRANSITION = {'kernel': 'crossfade', 'duration': 2.0, 'softness': 0.2, 'reverse': False}
+
+# Per-pair transitions (from pattern, to pattern) -> settings.
+# The first six replace the custom transitions of GLSLAnimation.frag.
+TRANSITIONS = {
+    # Energy ripples from the mouth outward to the mane
+    (3, 2): {'kernel': 'distance', 'duration': 2.5, 'softness': 0.3},
+    # Wave breaks into glitter around the head
+    (0, 4): {'kernel': 'angle', 'duration': 2.0, 'softness': 0.25},
+    # Breathing falls down into the cascade (from the outside in)
+    (1, 9): {'kernel': 'distance', 'duration': 3.0, 'softness': 0.4, 'reverse': True},
+    # Pulse turns into ripples feature by feature
+    (8, 11): {'kernel': 'group', 'duration': 2.5, 'softness': 0.2},
+    # Random bars settle into the bar pattern bar by bar
+    (6, 5): {'kernel': 'bar', 'duration': 2.0, 'softness': 0.1},
+    # Highlighted groups converge on the nose lines
+    (13, 12): {'kernel': 'distance', 'duration': 2.5, 'softness': 0.3, 'reverse': True}
+}
+
+
+class TransitionCompositor:
+    """Queue of pattern transitions and the uniforms needed to render the current one."""
+
+    def __init__(self, pattern=0, from_top='GLSLAnimationFrom'):
+        # Pattern shown when no transition is running
+        self.current_pattern = pattern
+        # GLSLAnimation instance rendering the "from" pattern (bypassed when idle)
+        self.from_top        = from_top
+        # Running transition (None when idle) and the ones waiting after it
+        self.active          = None
+        self.queue           = []
+        # Rig size for the group / bar order kernels
+        self.total_bars      = TOTAL_BARS
+        self.num_groups      = NUM_GROUPS
+
+    def get_transition(self, from_pattern, to_pattern):
+        """Looks up the settings for a pattern pair (falls back to the default crossfade)."""
+        settings = dict(DEFAULT_TRANSITION)
+        settings.update(TRANSITIONS.get((from_pattern, to_pattern), {}))
+        return settings
+
+    def queue_transition(self, to_pattern, kernel=None, duration=None, softness=None, reverse=None):
+        """Adds a transition to the queue. Settings not given come from the TRANSITIONS table."""
+        if isinstance(to_pattern, str):
+            to_pattern = PATTERNS[to_pattern]
+        self.queue.append({
+            'to': int(to_pattern),
+            'kernel': kernel,
+            'duration': duration,
+            'softness': softness,
+            'reverse': reverse
+        })
+        return len(self.queue)
+
+    def queue_sequence(self, patterns, **overrides):
+        """Queues several transitions that play one after the other."""
+        for pattern in patterns:
+            self.queue_transition(pattern, **overrides)
+        return len(self.queue)
+
+    def cut_to(self, pattern):
+        """Switches immediately, dropping the running and queued transitions."""
+        if isinstance(pattern, str):
+            pattern = PATTERNS[pattern]
+        self.current_pattern = int(pattern)
+        self.active = None
+        self.queue = []
+        LatencyTracer.trace_begin('u_pattern')
+        return
+
+    def start_next(self):
+        # Start the next queued transition from whatever pattern is showing now
+        request = self.queue.pop(0)
+        settings = self.get_transition(self.current_pattern, request['to'])
+        for key in ['kernel', 'duration', 'softness', 'reverse']:
+            if request[key] is not None:
+                settings[key] = request[key]
+
+        if settings['kernel'] not in KERNELS:
+            print(f"Warning: unknown transition kernel '{settings['kernel']}', using crossfade")
+            settings['kernel'] = 'crossfade'
+
+        settings['from'] = self.current_pattern
+        settings['to'] = request['to']
+        settings['elapsed'] = 0.0
+        self.active = settings
+        LatencyTracer.trace_begin('u_pattern')
+        return
+
+    def update(self, dt):
+        """Advances the running transition by dt seconds and starts queued ones."""
+        if self.active is None and self.queue:
+            self.start_next()
+        if self.active is None:
+            return
+
+        self.active['elapsed'] += dt
+        if self.active['elapsed'] >= self.active['duration']:
+            # Finished - the "to" pattern becomes the current one
+            self.current_pattern = self.active['to']
+            self.active = None
+            if self.queue:
+                self.start_next()
+        return
+
+    def progress(self):
+        """Progress of the running transition (0-1), 1.0 when idle."""
+        if self.active is None:
+            return 1.0
+        duration = max(self.active['duration'], 0.0001)
+        return min(self.active['elapsed'] / duration, 1.0)
+
+    def uniforms(self):
+        """Uniform values for the two pattern instances and the compositor."""
+        if self.active is None:
+            # Idle: only the "to" instance needs to render
+            uniforms = {
+                'from_pattern': self.current_pattern,
+                'to_pattern': self.current_pattern,
+                'from_active': 0,
+                'u_progress': 1.0,
+                'u_kernel': KERNELS['crossfade'],
+                'u_softness': DEFAULT_TRANSITION['softness'],
+                'u_reverse': 0
+            }
+        else:
+            uniforms = {
+                'from_pattern': self.active['from'],
+                'to_pattern': self.active['to'],
+                'from_active': 1,
+                'u_progress': self.progress(),
+                'u_kernel': KERNELS[self.active['kernel']],
+                'u_softness': self.active['softness'],
+                'u_reverse': 1 if self.active['reverse'] else 0
+            }
+        uniforms['u_total_bars'] = self.total_bars
+        uniforms['u_num_groups'] = self.num_groups
+        return uniforms
+
+    def apply(self, table_name='transition_uniforms'):
+        """Writes the uniform values to the table the GLSL TOPs read from."""
+        table = op(table_name)
+        if not table:
+            print(f"Warning: {table_name} table not found")
+            return False
+        table.clear()
+        table.appendRow(['name', 'value'])
+        uniforms = self.uniforms()
+        for name, value in uniforms.items():
+            table.appendRow([name, value])
+
+        # Skip rendering the "from" pattern when it is not visible
+        from_top = op(self.from_top)
+        if from_top is not None:
+            bypass = uniforms['from_active'] == 0
+            if from_top.bypass != bypass:
+                from_top.bypass = bypass
+
+        # Variants have the pattern compiled in - switch them in the same frame as the uniforms
+        variant_builder = op('ShaderVariantBuilder')
+        if variant_builder is not None:
+            variant_builder.module.update_variants()
+        return True
+
+
+# Compositor instance (kept between frames)
+compositor = TransitionCompositor()